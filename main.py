@@ -17,9 +17,9 @@ import os
 # Add the project root to the Python path so imports work correctly
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from src.document_loader import load_documents, split_documents
-from src.vector_store import create_vector_store
-from src.rag_chain import create_rag_chain, ask_question
+# The pipeline modules are imported inside the functions that use them:
+# LangChain, ChromaDB and the Gemini client take a second or two to import,
+# so the app starts faster and each step only loads what it needs
 
 
 def ingest_documents():
@@ -29,9 +29,12 @@ def ingest_documents():
     This is the "preparation" step that you run once (or whenever
     you add new documents). It:
     1. Reads all documents from data/sample_docs/
-    2. Splits them into smaller chunks
+    2. Splits them into smaller chunks (and removes duplicates)
     3. Creates embeddings and stores them in ChromaDB
     """
+    from src.document_loader import load_documents, split_documents, deduplicate_chunks
+    from src.vector_store import create_vector_store
+
     print("=" * 60)
     print("📥 DOCUMENT INGESTION")
     print("=" * 60)
@@ -47,8 +50,16 @@ def ingest_documents():
     # Split documents into chunks
     chunks = split_documents(documents)
 
+    # Drop repeated chunks so identical text is only embedded once
+    chunks = deduplicate_chunks(chunks)
+
     # Create the vector store (this also creates the embeddings)
-    create_vector_store(chunks)
+    try:
+        create_vector_store(chunks)
+    except Exception as e:
+        print(f"\n❌ Ingestion failed: {e}")
+        print("Check your API key and internet connection, then try again.\n")
+        return
 
     print("\n✅ Ingestion complete! You can now ask questions.\n")
 
@@ -60,23 +71,38 @@ def interactive_query():
     This creates the RAG chain and lets you ask questions in a loop.
     Type 'quit' or 'exit' to stop.
     """
+    from src.rag_chain import get_chain, ask_question, query_cache_stats
+
     print("=" * 60)
     print("🤖 RAG QUESTION-ANSWERING")
     print("=" * 60)
 
-    # Create the RAG chain (loads the vector store + connects to Gemini)
-    chain = create_rag_chain()
+    # Get the RAG chain (loads the vector store + connects to Gemini)
+    try:
+        chain = get_chain()
+    except ValueError as e:
+        print(f"\n❌ {e}")
+        print("Run the app again and answer 'y' to re-ingest documents.")
+        return
 
     print("Ask me anything about the documents in the knowledge base!")
     print("Type 'quit' or 'exit' to stop.\n")
     print("-" * 60)
 
     while True:
-        # Get question from user
-        question = input("\n❓ Your question: ").strip()
+        # Get question from user (Ctrl-C or Ctrl-D also stops the loop)
+        try:
+            question = input("\n❓ Your question: ").strip()
+        except (EOFError, KeyboardInterrupt):
+            question = "quit"
+            print()
 
         # Check for exit commands
         if question.lower() in ["quit", "exit", "q"]:
+            # Show how often a repeated question skipped the embedding API call
+            stats = query_cache_stats()
+            if stats is not None:
+                print(f"\n📊 Query cache: {stats.hits} hits, {stats.misses} misses")
             print("\n👋 Goodbye!")
             break
 
@@ -100,11 +126,10 @@ def interactive_query():
             # Display the source documents used
             print("\n📄 SOURCES USED:")
             print("─" * 60)
-            for i, doc in enumerate(response["source_documents"], 1):
-                source = doc.metadata.get("source", "Unknown")
-                print(f"\n  Source {i}: {source}")
-                # Show first 150 characters of the chunk
-                preview = doc.page_content[:150].replace("\n", " ")
+            for i, source in enumerate(response["sources"], 1):
+                print(f"\n  Source {i}: {source['source']}")
+                # Show the start of the chunk on one line
+                preview = source["preview"].replace("\n", " ")
                 print(f"  Preview: {preview}...")
 
         except Exception as e:
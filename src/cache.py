@@ -0,0 +1,179 @@
+"""
+cache.py - Embedding Cache
+===========================
+This file keeps a copy of every embedding we get back from Gemini on disk,
+so we never pay for the same embedding twice.
+
+WHY DO WE NEED THIS?
+- Every embedding is a network round-trip to the Gemini API
+- When you re-ingest your documents, most chunks haven't changed
+- Unchanged chunks can be served from the local cache instantly
+
+HOW DOES IT WORK?
+1. Each chunk's text is turned into a fingerprint (a SHA-256 hash)
+2. We look the fingerprint up in a small SQLite database
+3. Only the chunks we've never seen before are sent to Gemini
+4. The new embeddings are saved so the next run can reuse them
+
+Search queries get a smaller, in-memory cache instead: if you ask the same
+question twice in a session, the second lookup skips the Gemini call.
+"""
+
+import functools
+import hashlib
+import sqlite3
+import threading
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an embedding model and caches document embeddings on disk.
+
+    It behaves exactly like the embedding model it wraps, so it can be
+    passed anywhere LangChain expects an embedding function (e.g. Chroma).
+
+    Example:
+        embeddings = CachedEmbeddings(
+            GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL),
+            cache_path="embedding_cache.sqlite3",
+            namespace=EMBEDDING_MODEL,
+        )
+        vectors = embeddings.embed_documents(["hello", "world"])  # calls Gemini
+        vectors = embeddings.embed_documents(["hello", "world"])  # served from disk
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        cache_path: str,
+        namespace: str = "",
+        query_cache_size: int = 1024,
+        normalize: bool = False,
+        **embed_kwargs,
+    ):
+        """
+        Args:
+            embeddings: The real embedding model to call on a cache miss
+            cache_path: Path of the SQLite file the vectors are stored in
+            namespace: Mixed into every key (e.g. the model name), so switching
+                models never returns vectors from the old one
+            query_cache_size: How many recent query embeddings to keep in memory
+            normalize: Scale every returned vector to length 1, so that a plain
+                dot product between two vectors is their cosine similarity
+            **embed_kwargs: Extra options passed on every call to the real model
+                (e.g. output_dimensionality=768); include them in the namespace
+        """
+        self.embeddings = embeddings
+        self.namespace = namespace
+        self.normalize = normalize
+        self.embed_kwargs = embed_kwargs
+
+        # Remember the most recent query embeddings in memory (least recently
+        # used ones are dropped first). Tuples are cached so callers can't
+        # accidentally modify a cached vector.
+        self._embed_query_cached = functools.lru_cache(maxsize=query_cache_size)(
+            self._embed_query_uncached
+        )
+
+        # Embedding batches may arrive from several threads at once,
+        # so the connection is shared and guarded by a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vec BLOB)"
+        )
+        self._conn.commit()
+
+    def _key(self, text: str) -> str:
+        """Fingerprint a text (plus the namespace) with SHA-256."""
+        return hashlib.sha256(f"{self.namespace}\n{text}".encode("utf-8")).hexdigest()
+
+    def _finish(self, matrix: np.ndarray) -> list:
+        """Turn a matrix of vectors (one per row) into lists, normalizing if enabled."""
+        if self.normalize:
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            matrix = matrix / norms
+        return matrix.tolist()
+
+    def _lookup(self, keys: list) -> dict:
+        """Fetch the cached vectors for the given keys (missing keys are left out)."""
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+
+        with self._lock:
+            # SQLite limits how many "?" placeholders one query can have
+            for i in range(0, len(unique_keys), 500):
+                part = unique_keys[i:i + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT key, vec FROM embeddings WHERE key IN ({placeholders})",
+                    part,
+                )
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+
+        return found
+
+    def _store(self, items: list) -> None:
+        """Save (key, vector) pairs to the cache."""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vec) VALUES (?, ?)",
+                [(key, vec.tobytes()) for key, vec in items],
+            )
+            self._conn.commit()
+
+    def embed_documents(self, texts: list) -> list:
+        """
+        Embed a list of texts, calling the real model only for cache misses.
+
+        Args:
+            texts: The texts to embed
+
+        Returns:
+            A list of vectors, in the same order as texts
+        """
+        keys = [self._key(text) for text in texts]
+        found = self._lookup(keys)
+
+        # Only send the texts we haven't seen before to the real model
+        missing = [i for i, key in enumerate(keys) if key not in found]
+        if missing:
+            new_vectors = self.embeddings.embed_documents(
+                [texts[i] for i in missing], **self.embed_kwargs
+            )
+
+            # float32 uses half the disk space of Python's float64
+            new_items = [
+                (keys[i], np.asarray(vec, dtype=np.float32))
+                for i, vec in zip(missing, new_vectors)
+            ]
+            self._store(new_items)
+            found.update(new_items)
+
+        if not keys:
+            return []
+        return self._finish(np.stack([found[key] for key in keys]))
+
+    def _embed_query_uncached(self, text: str) -> tuple:
+        """Embed one query with the real model (wrapped in the LRU cache above)."""
+        vector = self.embeddings.embed_query(text, **self.embed_kwargs)
+        matrix = np.asarray([vector], dtype=np.float32)
+        return tuple(self._finish(matrix)[0])
+
+    def embed_query(self, text: str) -> list:
+        """Embed a search query (repeated queries are served from memory)."""
+        return list(self._embed_query_cached(text))
+
+    def warmup(self, queries: list) -> None:
+        """Pre-embed common queries so their first lookup is already cached."""
+        for query in queries:
+            self._embed_query_cached(query)
+
+    def query_cache_info(self):
+        """Return hit/miss statistics for the in-memory query cache."""
+        return self._embed_query_cached.cache_info()
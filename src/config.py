@@ -40,27 +40,121 @@ if not GOOGLE_API_KEY or GOOGLE_API_KEY == "your-gemini-api-key-here":
 # Which Gemini model to use for generating answers
 LLM_MODEL = "gemini-2.0-flash"
 
+# How many questions ask_many() sends to Gemini at the same time
+LLM_CONCURRENCY = 4
+
 # Which Gemini model to use for creating embeddings (turning text into vectors)
 EMBEDDING_MODEL = "models/gemini-embedding-001"
 
+# How many numbers each embedding vector has
+# The model produces 3072 by default, but it is trained so the first 768
+# carry almost all of the meaning. Keeping 768 makes every stored vector
+# 4x smaller and every similarity comparison 4x cheaper.
+# (If you change this, re-ingest your documents: answer 'y' when the app asks.)
+EMBEDDING_DIMENSIONS = 768
+
+# ─── Loading Settings ────────────────────────────────────────
+# Most worker processes that read PDFs at the same time
+# Parsing PDFs keeps a CPU core busy, so each worker gets its own core.
+# None = one worker per CPU core. Never more workers than PDFs are started,
+# and a single PDF (or .txt files) is read without any workers.
+LOADER_WORKERS = None
+
+# PDFs with less text than this per page (on average) are treated as
+# scanned images and sent through OCR instead of being read directly
+MIN_PDF_CHARS_PER_PAGE = 50
+
 # ─── Chunking Settings ───────────────────────────────────────
 # When we load documents, we split them into smaller "chunks"
 # These settings control how that splitting works
 
-# Maximum number of characters in each chunk
-CHUNK_SIZE = 500
+# Chunks are measured in tokens (the word pieces models read and bill by)
+# rather than characters, so every chunk carries a predictable amount of text.
+# tiktoken's cl100k_base encoding is a close stand-in for Gemini's tokenizer.
+TOKEN_ENCODING = "cl100k_base"
+
+# Maximum number of tokens in each chunk
+CHUNK_SIZE = 512
 
-# Number of characters that overlap between consecutive chunks
+# Number of tokens that overlap between consecutive chunks
 # Overlap ensures we don't lose context at chunk boundaries
-CHUNK_OVERLAP = 100
+CHUNK_OVERLAP = 64
+
+# Most tokens the embedding model reads from one chunk (Gemini cuts off the rest)
+# Any chunk longer than this is split again before it's embedded
+MAX_EMBED_TOKENS = 2048
+
+# ─── Embedding Settings ──────────────────────────────────────
+# How many chunks to send to the Gemini embedding API in one request
+# Batching means one HTTP round-trip per 100 chunks instead of one per chunk
+EMBED_BATCH_SIZE = 100
+
+# The most chunks Gemini accepts in one batch request
+# (EMBED_BATCH_SIZE is capped at this so a batch is never rejected)
+MAX_EMBED_BATCH_SIZE = 100
+
+# How many embedding batches to send to Gemini at the same time
+# Embedding is network-bound, so a few parallel requests finish much faster.
+# Keep this modest so we stay under the API's rate limits.
+EMBED_CONCURRENCY = 8
+
+# SQLite file where embeddings are cached, so unchanged chunks
+# don't have to be sent to Gemini again when you re-ingest
+EMBEDDING_CACHE_PATH = "embedding_cache.sqlite3"
+
+# How many recent question embeddings to keep in memory
+# Asking the same question again then skips the call to Gemini
+QUERY_CACHE_SIZE = 1024
+
+# Questions to embed as soon as the RAG chain starts, so they're
+# answered faster the first time (leave empty to skip the warmup)
+WARMUP_QUESTIONS = []
 
 # ─── Retrieval Settings ──────────────────────────────────────
 # How many relevant chunks to retrieve when answering a question
 TOP_K_RESULTS = 3
 
+# The question's TOP_K_RESULTS chunks are picked from this many close matches,
+# skipping ones that repeat what an already-picked chunk says (MMR)
+MMR_FETCH_K = 20
+
+# Balance between relevance and variety when picking chunks
+# (1.0 = most similar chunks only, 0.0 = as different from each other as possible)
+MMR_LAMBDA = 0.5
+
+# How many characters of each source chunk to keep as a preview in answers
+SOURCE_PREVIEW_CHARS = 150
+
 # ─── Database Settings ───────────────────────────────────────
 # Directory where ChromaDB will store the vector database
 CHROMA_DB_DIR = "chroma_db"
 
 # Name of the collection (like a table) in ChromaDB
 COLLECTION_NAME = "my_knowledge_base"
+
+# ─── Search Index Settings ───────────────────────────────────
+# ChromaDB finds similar vectors with an HNSW index: a graph where each
+# vector is linked to its nearest neighbours, so a search only has to
+# visit a small part of the database instead of comparing every vector.
+# These settings are applied when the collection is first created
+# (re-ingest your documents, answering 'y' when the app asks, to apply changes later).
+
+# Number of neighbours each vector is linked to (more = better recall, more memory)
+HNSW_M = 32
+
+# How hard to look for neighbours while building the index (more = better graph, slower ingest)
+HNSW_CONSTRUCTION_EF = 200
+
+# How many candidates to explore per query (more = better recall, slower search)
+HNSW_SEARCH_EF = 64
+
+# Answer questions from an in-memory copy of every vector (FastMemoryIndex)
+# instead of ChromaDB's index. Faster for small knowledge bases (up to tens of
+# thousands of chunks), but it uses plain top-k search instead of MMR and
+# only sees chunks that were stored before the chain was built.
+USE_MEMORY_INDEX = False
+
+# Keep the in-memory copy as float16 instead of float32. That halves its
+# memory use, but each search gets several times slower, because NumPy has
+# no fast float16 matrix multiply. Only worth it if memory is tight.
+MEMORY_INDEX_FLOAT16 = False
@@ -4,6 +4,7 @@ document_loader.py - Loading & Chunking Documents
 This file handles:
 1. Reading documents from a folder (supports .txt and .pdf files)
 2. Splitting documents into smaller chunks for better retrieval
+3. Removing duplicate chunks so the same text isn't embedded twice
 
 WHY DO WE SPLIT DOCUMENTS?
 - LLMs have a limited context window (max tokens they can process)
@@ -16,16 +17,126 @@ of the text. When someone asks a question, we find the most relevant cards
 instead of searching the entire book.
 """
 
+import hashlib
 import os
-from langchain_community.document_loaders import TextLoader, PyPDFLoader
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import fitz  # PyMuPDF
+import tiktoken
+from langchain_core.documents import Document
+from langchain_community.document_loaders import TextLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from src.config import CHUNK_SIZE, CHUNK_OVERLAP
+from src.config import (
+    CHUNK_SIZE,
+    CHUNK_OVERLAP,
+    TOKEN_ENCODING,
+    MAX_EMBED_TOKENS,
+    LOADER_WORKERS,
+    MIN_PDF_CHARS_PER_PAGE,
+)
+
+
+def _pdf_page(text: str, file_path: str, page: int, total_pages: int) -> Document:
+    """
+    Build the Document for one PDF page.
+
+    Both PDF paths (text layer and OCR) go through here, so every page gets
+    the same simple metadata. ChromaDB only accepts plain values (strings,
+    numbers, booleans) as metadata, and `page` is always counted from 0.
+    """
+    return Document(
+        page_content=text,
+        metadata={
+            "source": file_path,
+            "file_path": file_path,
+            "page": page,
+            "total_pages": total_pages,
+        },
+    )
+
+
+def _load_pdf(file_path: str) -> tuple:
+    """
+    Load a PDF, only falling back to slow OCR when it has no text layer.
+
+    Most PDFs store their text directly, and PyMuPDF can read it out in
+    milliseconds. Scanned PDFs are just pictures of pages, so for those we
+    fall back to Unstructured's OCR (optical character recognition), which
+    can take seconds per page.
+
+    Args:
+        file_path: Path to a .pdf file
+
+    Returns:
+        A (documents, method) tuple, where method says which path was used
+    """
+    # Tier 1: read the text layer directly (one document per page)
+    # The whole file is read into memory with one call, so MuPDF parses from
+    # RAM instead of making many small seeks and reads on the disk
+    data = Path(file_path).read_bytes()
+    with fitz.open(stream=data, filetype="pdf") as pdf:
+        pages = [page.get_text("text") for page in pdf]
+
+    text_chars = sum(len(text.strip()) for text in pages)
+    if pages and text_chars >= MIN_PDF_CHARS_PER_PAGE * len(pages):
+        documents = [
+            _pdf_page(text, file_path, page_number, len(pages))
+            for page_number, text in enumerate(pages)
+        ]
+        return documents, "text layer"
+
+    # Tier 2: (almost) no text found, so the pages are probably images
+    # Unstructured is a large optional install, so it's only needed here
+    from langchain_community.document_loaders import UnstructuredPDFLoader
+
+    try:
+        loader = UnstructuredPDFLoader(file_path, mode="paged", strategy="ocr_only")
+        ocr_pages = loader.load()
+    except ImportError:
+        raise RuntimeError(
+            "this PDF has no text layer and needs OCR; "
+            "install it with: pip install \"unstructured[pdf]\""
+        ) from None
+
+    # Unstructured's metadata includes lists (which ChromaDB rejects) and
+    # counts pages from 1, so keep only the text and rebuild the metadata
+    documents = [
+        _pdf_page(doc.page_content, file_path, doc.metadata.get("page_number", i + 1) - 1, len(pages))
+        for i, doc in enumerate(ocr_pages)
+    ]
+    return documents, "OCR"
+
+
+def _load_one(file_path: str) -> tuple:
+    """
+    Load a single .txt or .pdf file into Document objects.
+
+    This runs inside a worker process, so it must be a top-level function
+    (worker processes can only call functions they can import by name).
+
+    Args:
+        file_path: Path to a .txt or .pdf file
+
+    Returns:
+        A (documents, method) tuple: one Document per file for .txt or one
+        per page for .pdf, and a short note on how the file was read
+    """
+    if file_path.endswith(".txt"):
+        # TextLoader reads plain text files
+        loader = TextLoader(file_path, encoding="utf-8")
+        return loader.load(), "text"
+
+    return _load_pdf(file_path)
 
 
 def load_documents(directory_path: str) -> list:
     """
     Load all .txt and .pdf documents from a directory.
 
+    Files are parsed in parallel worker processes (one per CPU core by
+    default), because reading PDFs is CPU-heavy and one Python process can
+    only use one core at a time.
+
     Args:
         directory_path: Path to the folder containing documents
 
@@ -45,32 +156,50 @@ def load_documents(directory_path: str) -> list:
             f"Make sure you have documents in this folder."
         )
 
-    # Walk through all files in the directory
-    for filename in os.listdir(directory_path):
-        file_path = os.path.join(directory_path, filename)
+    # Walk through all files in the directory and collect the ones we can read
+    # os.scandir gives us each entry's name, path and type in one go,
+    # so we don't need an extra system call per file to check if it's a folder
+    files = []
+    with os.scandir(directory_path) as entries:
+        for entry in entries:
+            filename = entry.name
 
-        # Skip directories and hidden files
-        if os.path.isdir(file_path) or filename.startswith("."):
-            continue
-
-        try:
-            if filename.endswith(".txt"):
-                # TextLoader reads plain text files
-                loader = TextLoader(file_path, encoding="utf-8")
-                documents.extend(loader.load())
-                print(f"  ✅ Loaded: {filename}")
-
-            elif filename.endswith(".pdf"):
-                # PyPDFLoader reads PDF files (one document per page)
-                loader = PyPDFLoader(file_path)
-                documents.extend(loader.load())
-                print(f"  ✅ Loaded: {filename}")
+            # Skip directories and hidden files
+            if not entry.is_file() or filename.startswith("."):
+                continue
 
+            if filename.endswith((".txt", ".pdf")):
+                files.append((filename, entry.path))
             else:
                 print(f"  ⏭️  Skipped (unsupported format): {filename}")
 
-        except Exception as e:
-            print(f"  ❌ Error loading {filename}: {e}")
+    # Parse the PDFs in worker processes. Starting a worker costs more than
+    # reading a text file or a single PDF, so .txt files are read right here
+    # and the pool is only used when there are at least two PDFs.
+    pdf_paths = [file_path for filename, file_path in files if filename.endswith(".pdf")]
+    workers = min(len(pdf_paths), LOADER_WORKERS or os.cpu_count() or 1)
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    try:
+        futures = {}
+        if executor is not None:
+            futures = {file_path: executor.submit(_load_one, file_path) for file_path in pdf_paths}
+
+        # Results are collected in the original order, so the document
+        # order doesn't depend on which worker finishes first
+        for filename, file_path in files:
+            try:
+                if file_path in futures:
+                    docs, method = futures[file_path].result()
+                else:
+                    docs, method = _load_one(file_path)
+                documents.extend(docs)
+                print(f"  ✅ Loaded: {filename} ({method})")
+            except Exception as e:
+                print(f"  ❌ Error loading {filename}: {e}")
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
     if not documents:
         print("⚠️  No documents were loaded! Add .txt or .pdf files to the directory.")
@@ -102,17 +231,114 @@ def split_documents(documents: list) -> list:
         print(f"Split into {len(chunks)} chunks")
     """
     # Create the text splitter with our configured settings
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE,         # Max characters per chunk
-        chunk_overlap=CHUNK_OVERLAP,   # Characters of overlap between chunks
-        length_function=len,           # How to measure chunk length
+    # Chunk length is counted in tokens with tiktoken, so chunks are packed
+    # to the same token budget no matter how long the words are
+    text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+        encoding_name=TOKEN_ENCODING,  # How to measure chunk length (in tokens)
+        chunk_size=CHUNK_SIZE,         # Max tokens per chunk
+        chunk_overlap=CHUNK_OVERLAP,   # Tokens of overlap between chunks
+        disallowed_special=(),         # Count text like "<|endoftext|>" as plain text
         add_start_index=True,          # Track where each chunk starts in the original doc
     )
 
     # Split all documents into chunks
     chunks = text_splitter.split_documents(documents)
 
+    # Make sure no chunk is too long for the embedding model
+    chunks = _enforce_token_limit(chunks)
+
     print(f"\n📄 Split {len(documents)} documents into {len(chunks)} chunks")
-    print(f"   (chunk_size={CHUNK_SIZE}, overlap={CHUNK_OVERLAP})")
+    print(f"   (chunk_size={CHUNK_SIZE} tokens, overlap={CHUNK_OVERLAP} tokens)")
 
     return chunks
+
+
+def _enforce_token_limit(chunks: list) -> list:
+    """
+    Re-split any chunk that has more tokens than the embedding model accepts.
+
+    Gemini silently cuts off text past MAX_EMBED_TOKENS, so the end of an
+    over-long chunk would never make it into its embedding. With the default
+    CHUNK_SIZE this can't happen, but it protects you if you raise CHUNK_SIZE.
+
+    Args:
+        chunks: List of Document chunks
+
+    Returns:
+        The chunks, with over-long ones replaced by smaller pieces
+    """
+    # Count every chunk's tokens in one call (tiktoken spreads it over threads)
+    encoding = tiktoken.get_encoding(TOKEN_ENCODING)
+    # (disallowed_special=() counts text like "<|endoftext|>" as plain text)
+    token_lists = encoding.encode_batch(
+        [chunk.page_content for chunk in chunks], disallowed_special=()
+    )
+
+    if all(len(tokens) <= MAX_EMBED_TOKENS for tokens in token_lists):
+        return chunks
+
+    strict_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+        encoding_name=TOKEN_ENCODING,
+        chunk_size=MAX_EMBED_TOKENS,
+        chunk_overlap=CHUNK_OVERLAP,
+        disallowed_special=(),
+        add_start_index=True,
+    )
+
+    limited = []
+    for chunk, tokens in zip(chunks, token_lists):
+        if len(tokens) <= MAX_EMBED_TOKENS:
+            limited.append(chunk)
+            continue
+
+        print(f"  ✂️  Re-splitting a {len(tokens)}-token chunk from {chunk.metadata.get('source', 'Unknown')}")
+        for piece in strict_splitter.split_documents([chunk]):
+            # start_index is counted from the start of the original document,
+            # not from the start of the chunk we just split
+            piece.metadata["start_index"] = chunk.metadata.get("start_index", 0) + piece.metadata["start_index"]
+            limited.append(piece)
+
+    return limited
+
+
+def deduplicate_chunks(chunks: list) -> list:
+    """
+    Drop chunks whose text is exactly the same as an earlier chunk.
+
+    Repeated text (copied files, or headers and footers that appear on
+    every PDF page) would otherwise be embedded and stored once per copy,
+    costing an API call each time and crowding search results with
+    identical chunks.
+
+    The first copy is kept. The sources of the dropped copies are listed
+    in its metadata, so you can still see everywhere the text appeared.
+
+    Args:
+        chunks: List of Document chunks from split_documents()
+
+    Returns:
+        The chunks with duplicates removed, in their original order
+    """
+    unique = {}
+    for chunk in chunks:
+        # Fingerprint the text so the lookup doesn't compare whole chunks
+        key = hashlib.sha256(chunk.page_content.encode("utf-8")).digest()
+
+        first = unique.get(key)
+        if first is None:
+            unique[key] = chunk
+            continue
+
+        # Note where the duplicate came from on the chunk we're keeping
+        # (ChromaDB metadata can't hold lists, so sources are joined into one string)
+        first.metadata["duplicate_count"] = first.metadata.get("duplicate_count", 0) + 1
+        source = str(chunk.metadata.get("source", "Unknown"))
+        sources = first.metadata.get("duplicate_sources", "")
+        if source not in sources.split("; "):
+            first.metadata["duplicate_sources"] = f"{sources}; {source}" if sources else source
+
+    kept = list(unique.values())
+    if len(kept) < len(chunks):
+        print(f"🧹 Removed {len(chunks) - len(kept)} duplicate chunks ({len(kept)} left)")
+
+    return kept
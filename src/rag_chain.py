@@ -20,11 +20,22 @@ We define the structure of what we want to tell the LLM, and then
 fill in the blanks with the retrieved context and user's question.
 """
 
-from langchain_google_genai import ChatGoogleGenerativeAI
+import asyncio
 from langchain.prompts import PromptTemplate
 from langchain.chains import RetrievalQA
-from src.config import GOOGLE_API_KEY, LLM_MODEL, TOP_K_RESULTS
-from src.vector_store import load_vector_store
+from src.config import (
+    GOOGLE_API_KEY,
+    LLM_MODEL,
+    LLM_CONCURRENCY,
+    TOP_K_RESULTS,
+    USE_MEMORY_INDEX,
+    MMR_FETCH_K,
+    MMR_LAMBDA,
+    SOURCE_PREVIEW_CHARS,
+    WARMUP_QUESTIONS,
+)
+from src.cache import CachedEmbeddings
+from src.vector_store import load_vector_store, check_vector_store, FastMemoryIndex
 
 
 # ─── The Prompt Template ─────────────────────────────────────
@@ -44,6 +55,13 @@ QUESTION: {question}
 
 ANSWER:"""
 
+# The template is parsed once here, when the module is imported,
+# and shared by every chain create_rag_chain() builds
+RAG_PROMPT = PromptTemplate(
+    template=RAG_PROMPT_TEMPLATE,
+    input_variables=["context", "question"],
+)
+
 
 def create_rag_chain():
     """
@@ -65,22 +83,39 @@ def create_rag_chain():
     # Step 1: Load the vector store (our knowledge base)
     print("📚 Loading knowledge base...")
     vector_store = load_vector_store()
+    check_vector_store(vector_store)
+
+    # Pre-embed any common questions so they're cached before the first query
+    if WARMUP_QUESTIONS:
+        vector_store.embeddings.warmup(WARMUP_QUESTIONS)
 
     # Step 2: Create the retriever
-    # A retriever wraps the vector store and handles searching
-    retriever = vector_store.as_retriever(
-        search_type="similarity",       # Use cosine similarity
-        search_kwargs={"k": TOP_K_RESULTS}  # Return top K results
-    )
+    # A retriever wraps the vector store and handles searching.
+    if USE_MEMORY_INDEX:
+        # Copy every vector into memory once and score them all with NumPy
+        retriever = FastMemoryIndex(vector_store).as_retriever(k=TOP_K_RESULTS)
+    else:
+        # MMR (maximal marginal relevance) first fetches MMR_FETCH_K similar
+        # chunks, then picks the TOP_K_RESULTS that are relevant but also
+        # different from each other, so overlapping chunks don't fill the prompt
+        # with the same text twice.
+        retriever = vector_store.as_retriever(
+            search_type="mmr",
+            search_kwargs={
+                "k": TOP_K_RESULTS,              # Return top K results
+                "fetch_k": MMR_FETCH_K,          # Candidates to choose them from
+                "lambda_mult": MMR_LAMBDA,       # 1 = only relevance, 0 = only variety
+            },
+        )
 
-    # Step 3: Create the prompt template
-    # This formats the context and question into a clear prompt
-    prompt = PromptTemplate(
-        template=RAG_PROMPT_TEMPLATE,
-        input_variables=["context", "question"],
-    )
+    # Step 3: The prompt template (RAG_PROMPT, built once at import time)
+    # formats the context and question into a clear prompt
 
     # Step 4: Initialize the Gemini LLM
+    # (imported here, because the Gemini client is slow to import and only
+    # needed once a chain is actually built)
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
     llm = ChatGoogleGenerativeAI(
         model=LLM_MODEL,
         google_api_key=GOOGLE_API_KEY,
@@ -100,7 +135,7 @@ def create_rag_chain():
         chain_type="stuff",  # "stuff" = put all retrieved docs into one prompt
         retriever=retriever,
         return_source_documents=True,  # Also return the source chunks used
-        chain_type_kwargs={"prompt": prompt},
+        chain_type_kwargs={"prompt": RAG_PROMPT},
     )
 
     print("✅ RAG chain ready!\n")
@@ -108,6 +143,68 @@ def create_rag_chain():
     return rag_chain
 
 
+# The chain built by get_chain(), shared by every caller in this process
+_chain = None
+
+
+def get_chain():
+    """
+    Return the RAG chain, building it the first time it's needed.
+
+    Building the chain opens the vector store and connects to Gemini, so
+    code that answers many separate requests (e.g. a web server) should call
+    this instead of create_rag_chain() to only pay that cost once.
+
+    Returns:
+        The shared RetrievalQA chain
+    """
+    global _chain
+
+    if _chain is None:
+        _chain = create_rag_chain()
+
+    return _chain
+
+
+def query_cache_stats():
+    """
+    Return hit/miss statistics for the in-memory query cache.
+
+    The chain embeds questions with the vector store's embedding function
+    (load_vector_store() always returns that same store), so that's where
+    the statistics are kept, whichever retriever the chain uses.
+
+    Returns:
+        An object with .hits and .misses, or None if the embedding function
+        doesn't cache queries
+    """
+    embeddings = load_vector_store().embeddings
+    if not isinstance(embeddings, CachedEmbeddings):
+        return None
+
+    return embeddings.query_cache_info()
+
+
+def _summarize_sources(response: dict) -> dict:
+    """
+    Replace the full source chunks in a chain response with short previews.
+
+    The chain returns every retrieved chunk in full, but callers only show
+    where the answer came from. Keeping just the source and the first few
+    characters means the full chunk texts aren't held on to or copied around
+    (e.g. when the response is turned into JSON).
+    """
+    sources = []
+    for doc in response["source_documents"]:
+        sources.append({
+            "source": doc.metadata.get("source", "Unknown"),
+            "page": doc.metadata.get("page"),
+            "preview": doc.page_content[:SOURCE_PREVIEW_CHARS],
+        })
+
+    return {"result": response["result"], "sources": sources}
+
+
 def ask_question(chain, question: str) -> dict:
     """
     Ask a question to the RAG system.
@@ -119,7 +216,9 @@ def ask_question(chain, question: str) -> dict:
     Returns:
         A dictionary with:
         - "result": The generated answer
-        - "source_documents": The chunks used to generate the answer
+        - "sources": One {"source", "page", "preview"} dictionary per chunk
+          used to generate the answer (call chain.invoke() directly if you
+          need the full chunks)
 
     Example:
         chain = create_rag_chain()
@@ -129,4 +228,52 @@ def ask_question(chain, question: str) -> dict:
     # Invoke the chain with the question
     response = chain.invoke({"query": question})
 
-    return response
+    return _summarize_sources(response)
+
+
+async def ask_question_async(chain, question: str) -> dict:
+    """
+    Ask a question without blocking, so other work can run while Gemini answers.
+
+    Args:
+        chain: The RAG chain from create_rag_chain()
+        question: The user's question as a string
+
+    Returns:
+        The same dictionary as ask_question()
+    """
+    # ainvoke sends the request and awaits the reply instead of blocking the thread
+    response = await chain.ainvoke({"query": question})
+
+    return _summarize_sources(response)
+
+
+async def ask_many(chain, questions: list) -> list:
+    """
+    Ask several questions at once and wait for all the answers.
+
+    Almost all the time spent answering a question is waiting for Gemini,
+    so sending the questions together finishes much sooner than asking
+    them one after another. At most LLM_CONCURRENCY requests are in flight
+    at a time, to stay under the API's rate limits.
+
+    Args:
+        chain: The RAG chain from create_rag_chain()
+        questions: The questions to ask
+
+    Returns:
+        A list of response dictionaries, in the same order as questions
+
+    Example:
+        chain = create_rag_chain()
+        answers = asyncio.run(ask_many(chain, ["What is a list?", "What is a tuple?"]))
+        for answer in answers:
+            print(answer["result"])
+    """
+    semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+
+    async def ask_limited(question: str) -> dict:
+        async with semaphore:
+            return await ask_question_async(chain, question)
+
+    return await asyncio.gather(*(ask_limited(question) for question in questions))
@@ -19,46 +19,172 @@ WHAT IS A VECTOR DATABASE?
 HOW DOES SIMILARITY SEARCH WORK?
 When you ask "What is a function in Python?":
 1. Your question gets converted to a vector
-2. ChromaDB compares it to all stored vectors
+2. ChromaDB walks its HNSW index (a graph of nearest neighbours) to find
+   the closest stored vectors without comparing against every one
 3. The chunks with the most similar vectors are returned
 4. These become the "context" for the LLM to answer your question
 """
 
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_chroma import Chroma
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from src.cache import CachedEmbeddings
 from src.config import (
     GOOGLE_API_KEY,
     EMBEDDING_MODEL,
+    EMBEDDING_DIMENSIONS,
+    EMBED_BATCH_SIZE,
+    MAX_EMBED_BATCH_SIZE,
+    EMBED_CONCURRENCY,
+    EMBEDDING_CACHE_PATH,
+    QUERY_CACHE_SIZE,
     CHROMA_DB_DIR,
     COLLECTION_NAME,
+    HNSW_M,
+    HNSW_CONSTRUCTION_EF,
+    HNSW_SEARCH_EF,
+    MEMORY_INDEX_FLOAT16,
     TOP_K_RESULTS,
 )
 
+# The Gemini and ChromaDB libraries are slow to import, so they're only
+# imported inside the functions that use them (this import is just for type hints)
+if TYPE_CHECKING:
+    from langchain_chroma import Chroma
+
 
 def create_embedding_function():
     """
     Create the embedding function using Google Gemini.
 
     The embedding function converts text into vectors (lists of numbers).
-    We use Google's embedding model which produces high-quality embeddings.
+    We use Google's embedding model which produces high-quality embeddings,
+    shortened to EMBEDDING_DIMENSIONS numbers per vector and scaled to length 1,
+    and wrapped in a disk cache so the same text is never embedded twice.
 
     Returns:
-        A GoogleGenerativeAIEmbeddings object that can convert text to vectors
+        A CachedEmbeddings object that can convert text to vectors
     """
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
     embedding_function = GoogleGenerativeAIEmbeddings(
         model=EMBEDDING_MODEL,
         google_api_key=GOOGLE_API_KEY,
     )
-    return embedding_function
+    return CachedEmbeddings(
+        embedding_function,
+        cache_path=EMBEDDING_CACHE_PATH,
+        namespace=f"{EMBEDDING_MODEL}:{EMBEDDING_DIMENSIONS}",
+        query_cache_size=QUERY_CACHE_SIZE,
+        normalize=True,
+        output_dimensionality=EMBEDDING_DIMENSIONS,
+    )
+
+
+def _open_chroma(embedding_function) -> "Chroma":
+    """
+    Open the Chroma collection on disk, creating it if it doesn't exist yet.
+
+    New collections get the HNSW search index settings from config.py.
+    An existing collection keeps the settings it was created with.
+
+    Every vector is scaled to length 1 before it gets here (see
+    create_embedding_function), so we compare vectors by inner product: for
+    length-1 vectors it ranks exactly like cosine similarity, but skips
+    working out each vector's length on every comparison.
+
+    A collection created before that change keeps cosine distance (ChromaDB
+    fixes the setting at creation). That still gives correct results, and
+    re-ingesting rebuilds it with inner product (see create_vector_store).
+    """
+    from langchain_chroma import Chroma
+
+    return Chroma(
+        persist_directory=CHROMA_DB_DIR,
+        embedding_function=embedding_function,
+        collection_name=COLLECTION_NAME,
+        collection_metadata={
+            "hnsw:space": "ip",
+            "hnsw:M": HNSW_M,
+            "hnsw:construction_ef": HNSW_CONSTRUCTION_EF,
+            "hnsw:search_ef": HNSW_SEARCH_EF,
+        },
+    )
+
+
+def _chunk_id(chunk) -> str:
+    """
+    Build a stable ID for a chunk from its source, position and text.
+
+    The same chunk always gets the same ID, so a chunk that shows up twice
+    in one ingestion is stored once instead of being duplicated.
+    """
+    key = "\n".join([
+        str(chunk.metadata.get("source", "")),
+        str(chunk.metadata.get("page", "")),
+        str(chunk.metadata.get("start_index", "")),
+        chunk.page_content,
+    ])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def _embed_batch(embedding_function, texts: list) -> list:
+    """
+    Embed a batch of texts with a single API call.
 
+    If the batch request fails because of one bad chunk, we retry each text
+    on its own so one failure doesn't throw away the whole batch. Texts that
+    still fail get None instead of a vector.
 
-def create_vector_store(chunks: list) -> Chroma:
+    Some failures hit every request (a bad API key, an exceeded quota, no
+    network). Retrying those one text at a time would only fire off many
+    more doomed requests, so if the first two single-text retries both fail
+    the same way as the batch, we give up and raise the error instead.
+    (Two, so that one bad chunk at the start of a batch isn't mistaken for
+    a failure that hits every request.)
+
+    Args:
+        embedding_function: The embedding function from create_embedding_function()
+        texts: The chunk texts to embed
+
+    Returns:
+        A list of vectors (or None for failures), in the same order as texts
+
+    Raises:
+        Exception: The batch's error, if it isn't caused by a single chunk
+    """
+    try:
+        return embedding_function.embed_documents(texts)
+    except Exception as e:
+        batch_error = e
+        print(f"  ⚠️  Batch of {len(texts)} failed ({e}), retrying one by one...")
+
+    vectors = []
+    for i, text in enumerate(texts):
+        try:
+            vectors.append(embedding_function.embed_documents([text])[0])
+        except Exception as e:
+            vectors.append(None)
+            same_error = type(e) is type(batch_error)
+            if same_error and all(vec is None for vec in vectors) and len(vectors) == min(2, len(texts)):
+                # The batch's error again on every single text we tried:
+                # it isn't about one chunk, so stop sending requests
+                raise batch_error
+            print(f"  ❌ Could not embed chunk: {text[:50]!r}... ({e})")
+    return vectors
+
+
+def create_vector_store(chunks: list) -> "Chroma":
     """
     Create a vector store from document chunks.
 
     This function:
     1. Takes the text chunks from our documents
-    2. Converts each chunk into a vector using the embedding function
+    2. Converts the chunks into vectors in batches (one API call per batch,
+       with several batches in flight at once)
     3. Stores all vectors in ChromaDB
 
     Args:
@@ -67,56 +193,268 @@ def create_vector_store(chunks: list) -> Chroma:
     Returns:
         A Chroma vector store object (used for searching)
 
+    Raises:
+        RuntimeError: If no chunk at all could be embedded (the existing
+            database is left untouched)
+
     Note:
-        The first time you run this, it creates the database.
-        Subsequent runs will add to the existing database.
+        Every run rebuilds the collection from scratch, so chunks from
+        deleted or edited documents don't linger. Unchanged chunks are
+        still cheap to re-ingest: their embeddings come from the cache.
+        The old collection is only replaced once the new embeddings are
+        ready, so a failed run (e.g. an expired API key) doesn't wipe it.
     """
     print("\n🔄 Creating embeddings and storing in vector database...")
     print(f"   This may take a moment (processing {len(chunks)} chunks)...\n")
 
-    # Get the embedding function
-    embedding_function = create_embedding_function()
-
-    # Create the vector store
-    # ChromaDB will:
-    #   - Convert each chunk to a vector using the embedding function
-    #   - Store the vectors along with the original text
-    #   - Save everything to disk in the CHROMA_DB_DIR folder
-    vector_store = Chroma.from_documents(
-        documents=chunks,
-        embedding=embedding_function,
-        persist_directory=CHROMA_DB_DIR,
-        collection_name=COLLECTION_NAME,
-    )
+    # Open (or create) the vector store on disk
+    # It comes with the embedding function, which we use for the chunks here
+    # and which is still needed later so queries can be embedded
+    vector_store = load_vector_store()
+    embedding_function = vector_store.embeddings
+
+    # Split the chunks into batches
+    # Each batch is a single request to Gemini, instead of one request per chunk
+    # (never bigger than Gemini allows, or the whole request would be rejected)
+    batch_size = min(EMBED_BATCH_SIZE, MAX_EMBED_BATCH_SIZE)
+    batches = [
+        chunks[i:i + batch_size]
+        for i in range(0, len(chunks), batch_size)
+    ]
+
+    # Send up to EMBED_CONCURRENCY batches to Gemini at the same time.
+    # The threads only wait on the network; results are collected here
+    # on the main thread, in the original chunk order.
+    kept = []
+    done = 0
+    with ThreadPoolExecutor(max_workers=EMBED_CONCURRENCY) as executor:
+        futures = [
+            executor.submit(_embed_batch, embedding_function, [chunk.page_content for chunk in batch])
+            for batch in batches
+        ]
+
+        try:
+            for batch, future in zip(batches, futures):
+                vectors = future.result()
+                done += len(batch)
+
+                # Drop any chunks that couldn't be embedded even after retrying
+                kept.extend((chunk, vec) for chunk, vec in zip(batch, vectors) if vec is not None)
+
+                print(f"   Embedded {done}/{len(chunks)} chunks")
+        except Exception:
+            # Embedding is failing for every request: don't send the rest
+            executor.shutdown(cancel_futures=True)
+            print("❌ Embedding failed, so the existing vector database was left unchanged.")
+            raise
 
-    print(f"✅ Vector store created with {len(chunks)} chunks!")
+    if not kept:
+        raise RuntimeError(
+            f"None of the {len(chunks)} chunks could be embedded, "
+            f"so the existing vector database was left unchanged."
+        )
+
+    # Only now empty the collection and recreate it with the current settings.
+    # This also fixes databases built with older settings (e.g. a different
+    # EMBEDDING_DIMENSIONS), which ChromaDB would refuse to add vectors to,
+    # and moves databases from before vectors were normalized (which compare
+    # by cosine distance) over to the faster inner-product index.
+    vector_store.reset_collection()
+
+    # Write the pre-computed vectors straight into the Chroma collection, one
+    # batch at a time (upsert = insert new chunks, update ones already stored)
+    for i in range(0, len(kept), batch_size):
+        part = kept[i:i + batch_size]
+        vector_store._collection.upsert(
+            ids=[_chunk_id(chunk) for chunk, _ in part],
+            embeddings=[vec for _, vec in part],
+            documents=[chunk.page_content for chunk, _ in part],
+            metadatas=[chunk.metadata for chunk, _ in part],
+        )
+
+    print(f"✅ Vector store created with {len(kept)} chunks!")
     print(f"   Saved to: {CHROMA_DB_DIR}/")
 
     return vector_store
 
 
-def load_vector_store() -> Chroma:
+# Vector stores that are already open, keyed by (database folder, collection name)
+_vector_stores = {}
+
+
+def load_vector_store() -> "Chroma":
     """
     Load an existing vector store from disk.
 
     Use this when you've already created the vector store and want to
     query it without re-processing all the documents.
 
+    The store is only opened once per process: later calls return the same
+    object, so ChromaDB and the embedding cache aren't set up again each time.
+
     Returns:
         A Chroma vector store object (used for searching)
     """
-    embedding_function = create_embedding_function()
+    key = (CHROMA_DB_DIR, COLLECTION_NAME)
 
-    vector_store = Chroma(
-        persist_directory=CHROMA_DB_DIR,
-        embedding_function=embedding_function,
-        collection_name=COLLECTION_NAME,
-    )
+    if key not in _vector_stores:
+        embedding_function = create_embedding_function()
+        _vector_stores[key] = _open_chroma(embedding_function)
 
-    return vector_store
+    return _vector_stores[key]
+
+
+def check_vector_store(vector_store: "Chroma") -> None:
+    """
+    Make sure the stored vectors fit the current embedding settings.
+
+    A database built before EMBEDDING_DIMENSIONS was changed holds vectors
+    of a different length, and ChromaDB would reject every question with a
+    confusing error. This gives a clear message instead.
+
+    Raises:
+        ValueError: If the stored vectors have the wrong number of dimensions
+    """
+    sample = vector_store._collection.get(limit=1, include=["embeddings"])
+    embeddings = sample["embeddings"]
+    if embeddings is None or len(embeddings) == 0:
+        return
+
+    stored_dimensions = len(embeddings[0])
+    if stored_dimensions != EMBEDDING_DIMENSIONS:
+        raise ValueError(
+            f"The vector database in '{CHROMA_DB_DIR}/' holds {stored_dimensions}-number "
+            f"embeddings, but EMBEDDING_DIMENSIONS is {EMBEDDING_DIMENSIONS}. "
+            f"Re-ingest your documents to rebuild it."
+        )
+
+
+class FastMemoryIndex:
+    """
+    A simple in-memory copy of the vector store for fast searching.
+
+    For small knowledge bases, it's faster to keep every vector in one big
+    NumPy matrix and score them all with matrix multiplication than to go
+    through ChromaDB for each query. NumPy hands that
+    multiplication to an optimized math library (BLAS), which uses your
+    CPU's vector instructions.
+
+    It has the same similarity_search_with_score() method as Chroma, so it
+    can be passed to search_similar() in place of the vector store, and
+    as_retriever() lets the RAG chain search it. The chain only uses it when
+    USE_MEMORY_INDEX is turned on in config.py.
+
+    The index is a snapshot: chunks added to ChromaDB after it was built
+    aren't seen until you build a new FastMemoryIndex.
+
+    Example:
+        index = FastMemoryIndex(load_vector_store())
+        results = search_similar(index, "What is a function?")
+    """
+
+    def __init__(self, vector_store: "Chroma", float16: bool = MEMORY_INDEX_FLOAT16):
+        """
+        Args:
+            vector_store: The Chroma vector store to copy into memory
+            float16: Store the vectors as float16 to halve their memory use,
+                at the cost of slower searches (see _scores())
+        """
+        self.embeddings = vector_store.embeddings
+        self._dtype = np.float16 if float16 else np.float32
+
+        # Pull every stored chunk and its vector out of ChromaDB once
+        data = vector_store._collection.get(include=["embeddings", "documents", "metadatas"])
+        self._documents = [
+            Document(id=doc_id, page_content=text, metadata=metadata or {})
+            for doc_id, text, metadata in zip(data["ids"], data["documents"], data["metadatas"])
+        ]
+
+        # An empty collection has no vectors to build a matrix from
+        if not self._documents:
+            self._matrix = np.empty((0, 0), dtype=self._dtype)
+            return
+
+        # One row per chunk, scaled to length 1 so that a dot product
+        # between two rows is their cosine similarity. New vectors already
+        # are, but databases built before that change hold raw vectors,
+        # and scaling them here once is cheap.
+        matrix = np.asarray(data["embeddings"], dtype=np.float32).reshape(len(self._documents), -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+
+        # float32 by default; float16 halves the memory, and rankings don't
+        # change noticeably at that precision
+        self._matrix = (matrix / norms).astype(self._dtype, copy=False)
+
+    # Rows scored per step in _scores(); small enough to stay in the CPU cache
+    _BLOCK_ROWS = 1024
+
+    def _scores(self, query_vector) -> np.ndarray:
+        """
+        Dot product of the query with every stored vector.
+
+        A float32 matrix is scored with a single BLAS call. NumPy has no fast
+        float16 matrix multiply, so a float16 matrix is converted to float32
+        one block of rows at a time instead: memory use stays at the float16
+        size, but each search is several times slower than with float32.
+        """
+        if self._matrix.dtype == np.float32:
+            return self._matrix @ query_vector
+
+        scores = np.empty(len(self._matrix), dtype=np.float32)
+        for start in range(0, len(self._matrix), self._BLOCK_ROWS):
+            block = self._matrix[start:start + self._BLOCK_ROWS].astype(np.float32)
+            scores[start:start + len(block)] = block @ query_vector
+        return scores
+
+    def similarity_search_with_score(self, query: str, k: int = TOP_K_RESULTS) -> list:
+        """
+        Find the k chunks most similar to the query.
+
+        Returns:
+            A list of (Document, distance) tuples, where the distance is the
+            cosine distance (lower = more similar), just like ChromaDB
+        """
+        if not self._documents:
+            return []
+
+        # Scale the query to length 1 too (a no-op if the embedding
+        # function already normalizes)
+        query_vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        query_vector /= np.linalg.norm(query_vector) or 1.0
+
+        # Score every chunk with matrix-vector multiplications
+        scores = self._scores(query_vector)
+
+        # argpartition finds the top k without sorting all the scores,
+        # then we only sort those k
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [(self._documents[i], float(1.0 - scores[i])) for i in top]
+
+    def as_retriever(self, k: int = TOP_K_RESULTS) -> "MemoryIndexRetriever":
+        """Wrap the index in a LangChain retriever that returns the top k chunks."""
+        return MemoryIndexRetriever(index=self, k=k)
+
+
+class MemoryIndexRetriever(BaseRetriever):
+    """
+    A LangChain retriever that searches a FastMemoryIndex.
+
+    Chains like RetrievalQA only accept retrievers, so this adapts the
+    index's similarity_search_with_score() to that interface.
+    """
+
+    index: Any
+    k: int = TOP_K_RESULTS
+
+    def _get_relevant_documents(self, query: str, *, run_manager) -> list:
+        return [doc for doc, _ in self.index.similarity_search_with_score(query, k=self.k)]
 
 
-def search_similar(vector_store: Chroma, query: str, top_k: int = TOP_K_RESULTS) -> list:
+def search_similar(vector_store: "Chroma", query: str, top_k: int = TOP_K_RESULTS) -> list:
     """
     Search the vector store for chunks most similar to the query.
 
@@ -126,7 +464,7 @@ def search_similar(vector_store: Chroma, query: str, top_k: int = TOP_K_RESULTS)
     3. Return those chunks (they become context for the LLM)
 
     Args:
-        vector_store: The Chroma vector store to search
+        vector_store: The Chroma vector store (or a FastMemoryIndex) to search
         query: The user's question
         top_k: Number of results to return (default from config)
 
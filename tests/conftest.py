@@ -0,0 +1,13 @@
+"""
+conftest.py - Shared test setup
+================================
+Makes the project importable from the tests and gives src/config.py a
+dummy API key, so tests run without a .env file (they never call Gemini).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")
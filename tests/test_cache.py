@@ -0,0 +1,97 @@
+"""Tests for src/cache.py (uses a fake embedding model, no network)."""
+
+from langchain_core.embeddings import Embeddings
+
+from src.cache import CachedEmbeddings
+
+
+class FakeEmbeddings(Embeddings):
+    """Embeds a text as [len(text), 1.0] and records every text it's asked for."""
+
+    def __init__(self):
+        self.document_calls = []
+        self.query_calls = []
+
+    def embed_documents(self, texts, **kwargs):
+        self.document_calls.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text, **kwargs):
+        self.query_calls.append(text)
+        return [float(len(text)), 1.0]
+
+
+def make_cache(tmp_path, namespace="model-a", **kwargs):
+    fake = FakeEmbeddings()
+    cache = CachedEmbeddings(fake, cache_path=str(tmp_path / "cache.sqlite3"), namespace=namespace, **kwargs)
+    return fake, cache
+
+
+def test_only_misses_are_sent_to_the_model(tmp_path):
+    fake, cache = make_cache(tmp_path)
+
+    cache.embed_documents(["a", "bb"])
+    cache.embed_documents(["bb", "ccc", "a", "dddd"])
+
+    assert fake.document_calls == [["a", "bb"], ["ccc", "dddd"]]
+
+
+def test_output_order_matches_input_order(tmp_path):
+    fake, cache = make_cache(tmp_path)
+    cache.embed_documents(["ccc", "a"])
+
+    vectors = cache.embed_documents(["a", "dddd", "ccc", "bb"])
+
+    assert [vec[0] for vec in vectors] == [1.0, 4.0, 3.0, 2.0]
+
+
+def test_vectors_survive_reopening_the_cache(tmp_path):
+    _, cache = make_cache(tmp_path)
+    cache.embed_documents(["a", "bb"])
+
+    fake, reopened = make_cache(tmp_path)
+    vectors = reopened.embed_documents(["bb", "a"])
+
+    assert fake.document_calls == []
+    assert vectors == [[2.0, 1.0], [1.0, 1.0]]
+
+
+def test_namespaces_do_not_share_vectors(tmp_path):
+    _, cache = make_cache(tmp_path, namespace="model-a")
+    cache.embed_documents(["a"])
+
+    fake, other = make_cache(tmp_path, namespace="model-b")
+    other.embed_documents(["a"])
+
+    assert fake.document_calls == [["a"]]
+
+
+def test_lookups_larger_than_one_sqlite_query(tmp_path):
+    texts = [f"text {i}" for i in range(1200)]
+    fake, cache = make_cache(tmp_path)
+    cache.embed_documents(texts)
+
+    vectors = cache.embed_documents(texts)
+
+    assert len(fake.document_calls) == 1
+    assert [vec[0] for vec in vectors] == [float(len(text)) for text in texts]
+
+
+def test_repeated_queries_are_served_from_memory(tmp_path):
+    fake, cache = make_cache(tmp_path)
+
+    cache.embed_query("hello")
+    cache.embed_query("hello")
+
+    assert fake.query_calls == ["hello"]
+    assert cache.query_cache_info().hits == 1
+
+
+def test_normalize_scales_vectors_to_length_one(tmp_path):
+    _, cache = make_cache(tmp_path, normalize=True)
+
+    [vector] = cache.embed_documents(["aaaa"])  # raw vector is [4.0, 1.0]
+    query = cache.embed_query("")               # raw vector is [0.0, 1.0]
+
+    assert abs(sum(x * x for x in vector) - 1.0) < 1e-6
+    assert query == [0.0, 1.0]
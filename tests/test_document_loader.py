@@ -0,0 +1,117 @@
+"""
+Tests for src/document_loader.py (no OCR install needed).
+
+Tests that count tokens need tiktoken's encoding file, which tiktoken
+downloads on first use; they are skipped when it can't be loaded (offline).
+"""
+
+import fitz
+import langchain_community.document_loaders
+import pytest
+import tiktoken
+from langchain_core.documents import Document
+
+import src.document_loader
+from src.config import TOKEN_ENCODING
+from src.document_loader import _enforce_token_limit, _load_pdf, deduplicate_chunks, split_documents
+
+
+@pytest.fixture
+def token_encoding():
+    """Skip the test if tiktoken can't load (or download) its encoding."""
+    try:
+        tiktoken.get_encoding(TOKEN_ENCODING)
+    except Exception as e:
+        pytest.skip(f"tiktoken encoding {TOKEN_ENCODING!r} is not available: {e}")
+
+
+def test_ocr_pages_get_the_same_metadata_as_text_pages(tmp_path, monkeypatch):
+    # A PDF with two blank pages has no text layer, so it goes to OCR
+    path = tmp_path / "scan.pdf"
+    pdf = fitz.open()
+    pdf.new_page()
+    pdf.new_page()
+    pdf.save(path)
+
+    class FakeOCRLoader:
+        def __init__(self, file_path, **kwargs):
+            pass
+
+        def load(self):
+            return [
+                Document(page_content=f"page {n}", metadata={"page_number": n, "languages": ["eng"]})
+                for n in (1, 2)
+            ]
+
+    monkeypatch.setattr(langchain_community.document_loaders, "UnstructuredPDFLoader", FakeOCRLoader)
+
+    documents, method = _load_pdf(str(path))
+
+    assert method == "OCR"
+    assert [doc.metadata for doc in documents] == [
+        {"source": str(path), "file_path": str(path), "page": page, "total_pages": 2}
+        for page in (0, 1)
+    ]
+
+
+def test_over_long_chunks_are_resplit_with_document_offsets(monkeypatch, token_encoding):
+    monkeypatch.setattr(src.document_loader, "MAX_EMBED_TOKENS", 10)
+    monkeypatch.setattr(src.document_loader, "CHUNK_OVERLAP", 0)
+
+    text = " ".join(f"word{i}" for i in range(40))
+    short = Document(page_content="short", metadata={"source": "a.txt", "start_index": 0})
+    long = Document(page_content=text, metadata={"source": "a.txt", "start_index": 100})
+
+    chunks = _enforce_token_limit([short, long])
+
+    assert chunks[0] is short
+    pieces = chunks[1:]
+    assert len(pieces) > 1
+    for piece in pieces:
+        # start_index points into the original document, not into the long chunk
+        offset = piece.metadata["start_index"] - 100
+        assert text[offset:offset + len(piece.page_content)] == piece.page_content
+        assert piece.metadata["source"] == "a.txt"
+
+
+def test_split_documents_accepts_special_token_text(token_encoding):
+    # tiktoken refuses text like this by default; in a document it's just text
+    document = Document(page_content="GPT models end a sample with <|endoftext|>.", metadata={})
+
+    chunks = split_documents([document])
+
+    assert [chunk.page_content for chunk in chunks] == [document.page_content]
+
+
+def test_resplitting_accepts_special_token_text(monkeypatch, token_encoding):
+    monkeypatch.setattr(src.document_loader, "MAX_EMBED_TOKENS", 10)
+    monkeypatch.setattr(src.document_loader, "CHUNK_OVERLAP", 0)
+    text = " ".join(f"word{i}" for i in range(40)) + " <|endoftext|>"
+
+    chunks = _enforce_token_limit([Document(page_content=text, metadata={"start_index": 0})])
+
+    assert "<|endoftext|>" in chunks[-1].page_content
+
+
+def test_deduplicate_keeps_first_copy_and_records_sources():
+    chunks = [
+        Document(page_content="header", metadata={"source": "a.pdf", "page": 0}),
+        Document(page_content="body a", metadata={"source": "a.pdf", "page": 0}),
+        Document(page_content="header", metadata={"source": "a.pdf", "page": 1}),
+        Document(page_content="header", metadata={"source": "b.pdf", "page": 0}),
+        Document(page_content="body b", metadata={"source": "b.pdf", "page": 0}),
+    ]
+
+    kept = deduplicate_chunks(chunks)
+
+    assert [chunk.page_content for chunk in kept] == ["header", "body a", "body b"]
+    assert kept[0] is chunks[0]
+    assert kept[0].metadata["duplicate_count"] == 2
+    assert kept[0].metadata["duplicate_sources"] == "a.pdf; b.pdf"
+    assert "duplicate_count" not in kept[1].metadata
+
+
+def test_deduplicate_leaves_unique_chunks_alone():
+    chunks = [Document(page_content=text, metadata={"source": "a.txt"}) for text in ("x", "y", "z")]
+
+    assert deduplicate_chunks(chunks) == chunks
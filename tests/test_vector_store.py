@@ -0,0 +1,176 @@
+"""Tests for src/vector_store.py (uses fake embedding models, no network)."""
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+import src.vector_store
+from src.vector_store import FastMemoryIndex, _embed_batch, create_vector_store, load_vector_store
+
+
+class BadChunkError(Exception):
+    pass
+
+
+class PerChunkFailures(Embeddings):
+    """Rejects any request that contains the text "bad", like one invalid chunk would."""
+
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts, **kwargs):
+        self.calls.append(list(texts))
+        if "bad" in texts:
+            raise BadChunkError("invalid chunk")
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text, **kwargs):
+        return [float(len(text)), 1.0]
+
+
+class AlwaysFails(Embeddings):
+    """Fails every request, like a bad API key or no network."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed_documents(self, texts, **kwargs):
+        self.calls += 1
+        raise PermissionError("API key not valid")
+
+    def embed_query(self, text, **kwargs):
+        raise PermissionError("API key not valid")
+
+
+@pytest.fixture
+def use_embeddings(tmp_path, monkeypatch):
+    """Point the vector store at a temporary folder; call it with the embedder to use."""
+    monkeypatch.setattr(src.vector_store, "CHROMA_DB_DIR", str(tmp_path / "chroma_db"))
+
+    def use(embeddings):
+        monkeypatch.setattr(src.vector_store, "create_embedding_function", lambda: embeddings)
+        monkeypatch.setattr(src.vector_store, "_vector_stores", {})
+
+    return use
+
+
+def make_chunks(*texts):
+    return [Document(page_content=text, metadata={"source": f"{i}.txt"}) for i, text in enumerate(texts)]
+
+
+def test_embed_batch_retries_one_by_one_and_keeps_order():
+    embeddings = PerChunkFailures()
+
+    vectors = _embed_batch(embeddings, ["a", "bad", "ccc"])
+
+    assert vectors == [[1.0, 1.0], None, [3.0, 1.0]]
+    assert embeddings.calls == [["a", "bad", "ccc"], ["a"], ["bad"], ["ccc"]]
+
+
+def test_embed_batch_gives_up_when_every_request_fails():
+    embeddings = AlwaysFails()
+
+    with pytest.raises(PermissionError):
+        _embed_batch(embeddings, ["a", "bb", "ccc"])
+
+    # The batch request plus two single-text retries, not one per text
+    assert embeddings.calls == 3
+
+
+def test_embed_batch_survives_a_bad_first_chunk():
+    embeddings = PerChunkFailures()
+
+    vectors = _embed_batch(embeddings, ["bad", "bb"])
+
+    assert vectors == [None, [2.0, 1.0]]
+
+
+def test_failed_reingest_keeps_the_existing_database(use_embeddings):
+    use_embeddings(PerChunkFailures())
+    create_vector_store(make_chunks("a", "bb"))
+
+    failing = AlwaysFails()
+    use_embeddings(failing)
+    with pytest.raises(PermissionError):
+        create_vector_store(make_chunks("a", "bb", "ccc"))
+
+    assert load_vector_store()._collection.count() == 2
+    assert failing.calls == 3
+
+
+def test_reingest_replaces_old_chunks(use_embeddings):
+    use_embeddings(PerChunkFailures())
+    create_vector_store(make_chunks("a", "bb"))
+
+    create_vector_store(make_chunks("ccc", "bad"))
+
+    stored = load_vector_store()._collection.get()
+    assert stored["documents"] == ["ccc"]
+
+
+class FixedQuery(Embeddings):
+    """Embeds every query as the same vector."""
+
+    def __init__(self, query_vector):
+        self.query_vector = query_vector
+
+    def embed_documents(self, texts, **kwargs):
+        raise AssertionError("documents are written to the collection directly")
+
+    def embed_query(self, text, **kwargs):
+        return self.query_vector
+
+
+def stored_store(use_embeddings, vectors, query_vector=(0.0, 1.0)):
+    """Open a vector store holding one chunk per vector, named "c0", "c1", ..."""
+    use_embeddings(FixedQuery(list(query_vector)))
+    store = load_vector_store()
+    if vectors:
+        store._collection.add(
+            ids=[f"id{i}" for i in range(len(vectors))],
+            embeddings=[list(vec) for vec in vectors],
+            documents=[f"c{i}" for i in range(len(vectors))],
+        )
+    return store
+
+
+def test_memory_index_returns_top_k_with_cosine_distances(use_embeddings):
+    store = stored_store(use_embeddings, [(1.0, 0.0), (0.6, 0.8), (0.0, 1.0)])
+
+    results = FastMemoryIndex(store).similarity_search_with_score("q", k=2)
+
+    assert [doc.page_content for doc, _ in results] == ["c2", "c1"]
+    assert [distance for _, distance in results] == pytest.approx([0.0, 0.2], abs=1e-6)
+
+
+def test_memory_index_normalizes_legacy_rows(use_embeddings):
+    # Vectors stored before embeddings were normalized have other lengths
+    store = stored_store(use_embeddings, [(10.0, 0.0), (3.0, 4.0)], query_vector=(0.0, 2.0))
+
+    results = FastMemoryIndex(store).similarity_search_with_score("q", k=2)
+
+    assert [doc.page_content for doc, _ in results] == ["c1", "c0"]
+    assert [distance for _, distance in results] == pytest.approx([0.2, 1.0], abs=1e-6)
+
+
+def test_memory_index_float16_ranks_like_float32(use_embeddings):
+    store = stored_store(use_embeddings, [(1.0, 0.0), (0.6, 0.8), (0.0, 1.0), (0.8, 0.6)])
+
+    results = FastMemoryIndex(store, float16=True).similarity_search_with_score("q", k=4)
+
+    assert [doc.page_content for doc, _ in results] == ["c2", "c1", "c3", "c0"]
+    assert [distance for _, distance in results] == pytest.approx([0.0, 0.2, 0.4, 1.0], abs=1e-3)
+
+
+def test_memory_index_on_an_empty_collection(use_embeddings):
+    store = stored_store(use_embeddings, [])
+
+    assert FastMemoryIndex(store).similarity_search_with_score("q") == []
+
+
+def test_memory_index_retriever_returns_documents(use_embeddings):
+    store = stored_store(use_embeddings, [(1.0, 0.0), (0.0, 1.0)])
+
+    documents = FastMemoryIndex(store).as_retriever(k=1).invoke("q")
+
+    assert [doc.page_content for doc in documents] == ["c1"]